@@ -7,6 +7,12 @@ import bcrypt
 import re
 import time
 import uuid # Für eindeutige Team-IDs und Codes
+import threading # Locks für Lern-Journal und Datendateien
+import hashlib # Inhalts-Hashes für Backups
+import gzip
+import zlib
+import shutil
+from datetime import date, datetime, timedelta
 from difflib import SequenceMatcher
 import pandas as pd # NEU für Altair Diagramme
 import altair as alt # NEU für Altair Diagramme
@@ -16,6 +22,10 @@ USER_DATA_DIR = "user_data"
 USERS_FILE = os.path.join(USER_DATA_DIR, "users.json")
 PUBLIC_VERSES_FILE = os.path.join(USER_DATA_DIR, "public_verses.json")
 TEAM_DATA_FILE = os.path.join(USER_DATA_DIR, "teams.json")
+EVENT_JOURNAL_DIR = os.path.join(USER_DATA_DIR, "events") # Append-only Lern-Journal (JSONL-Segmente)
+STATS_SNAPSHOT_FILE = os.path.join(USER_DATA_DIR, "stats_snapshot.json")
+BACKUP_DIR = "backups" # Liegt bewusst außerhalb von user_data
+BACKUP_MANIFEST_NAME = "manifest.json"
 ADMIN_PASSWORD = "bibelfeld" 
 
 MAX_CHUNKS = 8
@@ -23,6 +33,12 @@ COLS_PER_ROW = 4
 LEADERBOARD_SIZE = 7
 AUTO_ADVANCE_DELAY = 2 
 COMPLETION_PAUSE_DELAY = 6 
+EVENT_FSYNC_BATCH = 20 # fsync spätestens nach so vielen Events...
+EVENT_FSYNC_INTERVAL = 5 # ...oder nach so vielen Sekunden
+EVENT_SNAPSHOT_EVERY = 200 # Events bis zum nächsten Statistik-Snapshot
+EVENT_SEGMENT_MAX_BYTES = 1_000_000 # Danach wird ein neues Journal-Segment begonnen
+STATS_COUNTER_KEYS = ("points", "learning_time_seconds", "total_verses_learned", "total_words_learned")
+LEADERBOARD_WINDOWS = { "all": "Gesamt", "week": "Diese Woche", "day": "Heute" }
 
 LANGUAGES = { "DE": "🇩🇪 Deutsch", "EN": "🇬🇧 English" }
 DEFAULT_LANGUAGE = "DE"
@@ -32,6 +48,7 @@ VERSE_EMOJI = "📖"
 
 # --- Hilfsfunktionen ---
 os.makedirs(USER_DATA_DIR, exist_ok=True)
+os.makedirs(EVENT_JOURNAL_DIR, exist_ok=True)
 
 # --- Parser für Bibeltexte ---
 def parse_verses_from_text(raw_text):
@@ -76,18 +93,28 @@ def load_data(file_path, default_value={}):
             st.error(f"Datei '{os.path.basename(file_path)}' korrupt oder nicht lesbar."); return default_value
     return default_value
 
+@st.cache_resource
+def _get_data_lock():
+    # Prozessweites Lock für alle Schreibzugriffe in user_data (Backups lesen unter demselben Lock).
+    # Reentrant, damit zusammengehörige Updates (z.B. users.json + teams.json) es als Ganzes halten können.
+    return threading.RLock()
+
+def _write_file_atomic(file_path, content_bytes):
+    # Erst Temp-Datei schreiben, dann atomar ersetzen -> nie halb geschriebene Dateien
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f: f.write(content_bytes); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+
+def _json_bytes(data_param): return json.dumps(data_param, indent=2, ensure_ascii=False).encode('utf-8')
+
 def save_data(file_path, data_to_save):
     try:
-        with open(file_path, "w", encoding='utf-8') as f: json.dump(data_to_save, f, indent=2, ensure_ascii=False)
+        with _get_data_lock(): _write_file_atomic(file_path, _json_bytes(data_to_save))
     except IOError: st.error(f"Fehler beim Speichern von '{os.path.basename(file_path)}'.")
 
-
 def load_users():
     users_data = load_data(USERS_FILE)
-    for username_key in users_data:
-        users_data[username_key].setdefault('points', 0); users_data[username_key].setdefault('team_id', None)
-        users_data[username_key].setdefault('learning_time_seconds', 0); users_data[username_key].setdefault('total_verses_learned', 0)
-        users_data[username_key].setdefault('total_words_learned', 0)
+    for username_key in users_data: users_data[username_key].setdefault('team_id', None) # Punkte/Statistik: siehe Lern-Journal
     return users_data
 
 def save_users(users_data_to_save): save_data(USERS_FILE, users_data_to_save)
@@ -140,6 +167,295 @@ def save_public_verses(language_code_param, lang_specific_data_param):
     all_data[language_code_param] = {title: details for title, details in lang_specific_data_param.items() if details.get('public', True)}
     save_data(PUBLIC_VERSES_FILE, all_data)
 
+# --- Lern-Journal & Statistiken ---
+# Jede bewertete Antwort wird als JSON-Zeile angehängt (O(1) statt users.json neu zu schreiben).
+# Zähler und Tageswerte werden periodisch in stats_snapshot.json materialisiert; vollständig
+# eingearbeitete Segmente werden danach gelöscht (Kompaktierung).
+def _event_segment_path(segment_no): return os.path.join(EVENT_JOURNAL_DIR, f"events_{segment_no:06d}.jsonl")
+
+def _list_event_segments():
+    segments = []
+    for file_name in os.listdir(EVENT_JOURNAL_DIR):
+        match = re.match(r"^events_(\d+)\.jsonl$", file_name)
+        if match: segments.append(int(match.group(1)))
+    return sorted(segments)
+
+@st.cache_resource
+def _get_event_journal():
+    # Prozessweiter Zustand (überlebt Reruns): offenes Segment, Lock und fsync-Batching
+    segments = _list_event_segments()
+    return {"lock": threading.Lock(), "fh": None, "segment": segments[-1] if segments else 1,
+            "pending": 0, "last_sync": time.time(), "since_snapshot": 0, "sync_timer": None}
+
+def _sync_event_journal(journal):
+    if journal["fh"] is not None and journal["pending"]: journal["fh"].flush(); os.fsync(journal["fh"].fileno())
+    journal["pending"] = 0; journal["last_sync"] = time.time()
+
+def _sync_event_journal_when_due():
+    # Timer-Callback: garantiert das fsync-Intervall auch, wenn danach keine Events mehr kommen
+    journal = _get_event_journal()
+    with journal["lock"]:
+        journal["sync_timer"] = None
+        try: _sync_event_journal(journal)
+        except (IOError, ValueError): pass # Segment inzwischen geschlossen (z.B. Restore)
+
+def _open_event_segment(segment_no):
+    # Abgerissene letzte Zeile (Absturz beim Schreiben) abschneiden, sonst klebt das nächste Event daran
+    segment_path = _event_segment_path(segment_no)
+    if os.path.exists(segment_path):
+        with open(segment_path, "rb+") as f:
+            raw_data = f.read(); end = raw_data.rfind(b"\n") + 1
+            if end < len(raw_data): f.truncate(end)
+    return open(segment_path, "a", encoding='utf-8')
+
+def _append_event(event):
+    journal = _get_event_journal()
+    with journal["lock"]:
+        try:
+            if journal["fh"] is not None and journal["fh"].tell() >= EVENT_SEGMENT_MAX_BYTES:
+                _sync_event_journal(journal); journal["fh"].close(); journal["fh"] = None; journal["segment"] += 1
+            if journal["fh"] is None: journal["fh"] = _open_event_segment(journal["segment"])
+            journal["fh"].write(json.dumps(event, ensure_ascii=False) + "\n"); journal["fh"].flush()
+            journal["pending"] += 1; journal["since_snapshot"] += 1
+            if journal["pending"] >= EVENT_FSYNC_BATCH or time.time() - journal["last_sync"] >= EVENT_FSYNC_INTERVAL:
+                _sync_event_journal(journal)
+            elif journal["sync_timer"] is None:
+                journal["sync_timer"] = threading.Timer(EVENT_FSYNC_INTERVAL, _sync_event_journal_when_due)
+                journal["sync_timer"].daemon = True; journal["sync_timer"].start()
+        except IOError: st.error("Fehler beim Schreiben des Lern-Journals."); return
+        snapshot_due = journal["since_snapshot"] >= EVENT_SNAPSHOT_EVERY
+    if snapshot_due: materialize_stats_snapshot()
+
+def append_learning_event(username_param, language_code_param, text_title_param, ref_param, correct_param, duration_param, words_param):
+    _append_event({"ts": time.time(), "user": username_param, "lang": language_code_param, "text": text_title_param,
+                   "ref": ref_param, "correct": bool(correct_param), "duration": int(duration_param), "words": int(words_param)})
+
+def append_points_reset_event(): _append_event({"ts": time.time(), "type": "reset_points"}) # Admin: alle Punkte auf 0
+
+def _empty_learning_stats(users_data_param=None):
+    # Ausgangswerte: bisherige kumulative Zähler und Punkte aus users.json
+    users_data_param = load_users() if users_data_param is None else users_data_param
+    return {"segment": 1, "offset": 0, "daily": {},
+            "totals": {u_name: {k: u_data.get(k, 0) for k in STATS_COUNTER_KEYS} for u_name, u_data in users_data_param.items()}}
+
+def _apply_learning_event(stats_param, event_param):
+    if event_param.get("type") == "reset_points":
+        for totals in stats_param["totals"].values(): totals["points"] = 0
+        return
+    if event_param.get("type") == "restore_user": # Einzel-Wiederherstellung aus einem Backup
+        stats_param["totals"][event_param["user"]] = dict(event_param["totals"])
+        stats_param["daily"][event_param["user"]] = {day: dict(b) for day, b in event_param["daily"].items()}
+        return
+    user_name = event_param["user"]; day = date.fromtimestamp(event_param.get("ts", 0)).isoformat()
+    totals = stats_param["totals"].setdefault(user_name, dict.fromkeys(STATS_COUNTER_KEYS, 0))
+    for counter_key in STATS_COUNTER_KEYS: totals.setdefault(counter_key, 0) # Ältere Snapshots ohne Punkte
+    bucket = stats_param["daily"].setdefault(user_name, {}).setdefault(day, {"seconds": 0, "verses": 0, "words": 0, "wrong": 0})
+    if event_param.get("correct"):
+        totals["points"] += event_param.get("words", 0) # Ein Punkt pro korrekt gelerntem Wort
+        totals["learning_time_seconds"] += event_param.get("duration", 0); totals["total_verses_learned"] += 1
+        totals["total_words_learned"] += event_param.get("words", 0)
+        bucket["seconds"] += event_param.get("duration", 0); bucket["verses"] += 1; bucket["words"] += event_param.get("words", 0)
+    else: bucket["wrong"] += 1
+
+def _fold_event_tail(stats_param, segments_param=None):
+    # Wendet alle Events ab der Snapshot-Position an; unvollständige letzte Zeilen werden ausgelassen.
+    # segments_param ({Nr: Inhalt}) ersetzt das Journal in user_data, z.B. beim Lesen aus einem Backup.
+    for segment_no in _list_event_segments() if segments_param is None else sorted(segments_param):
+        if segment_no < stats_param["segment"]: continue
+        offset = stats_param["offset"] if segment_no == stats_param["segment"] else 0
+        if segments_param is not None: raw_data = segments_param[segment_no][offset:]
+        else:
+            try:
+                with open(_event_segment_path(segment_no), "rb") as f: f.seek(offset); raw_data = f.read()
+            except IOError: continue
+        end = raw_data.rfind(b"\n") + 1
+        for raw_line in raw_data[:end].splitlines():
+            try: _apply_learning_event(stats_param, json.loads(raw_line))
+            except (ValueError, KeyError, TypeError, AttributeError): continue
+        stats_param["segment"] = segment_no; stats_param["offset"] = offset + end
+    return stats_param
+
+def load_learning_stats(): return _fold_event_tail(load_data(STATS_SNAPSHOT_FILE) or _empty_learning_stats())
+
+def materialize_stats_snapshot():
+    journal = _get_event_journal()
+    with journal["lock"]:
+        _sync_event_journal(journal) # Snapshot darf nur dauerhaft geschriebene Events abdecken
+        stats = load_learning_stats()
+        try:
+            with _get_data_lock(): _write_file_atomic(STATS_SNAPSHOT_FILE, _json_bytes(stats))
+        except IOError: # Ohne gespeicherten Snapshot nichts kompaktieren, sonst gehen Events verloren
+            st.error(f"Fehler beim Speichern von '{os.path.basename(STATS_SNAPSHOT_FILE)}'."); return
+        for segment_no in _list_event_segments():
+            if segment_no < stats["segment"]:
+                try: os.remove(_event_segment_path(segment_no))
+                except OSError: pass
+        journal["since_snapshot"] = 0
+
+def _window_start(window_param):
+    today = date.today()
+    if window_param == "day": return today.isoformat()
+    if window_param == "week": return (today - timedelta(days=today.weekday())).isoformat()
+    return None
+
+def words_learned_since(stats_param, window_param):
+    since = _window_start(window_param)
+    return {u_name: sum(b["words"] for day, b in days.items() if since is None or day >= since)
+            for u_name, days in stats_param["daily"].items()}
+
+def aggregate_learning_stats(stats_param, username_param, period_param="day", num_periods=7):
+    # Tages- bzw. Wochenwerte (ISO-Woche) der letzten `num_periods` Zeiträume, älteste zuerst
+    today = date.today(); step = 7 if period_param == "week" else 1
+    def period_key(d): return "{}-W{:02d}".format(*d.isocalendar()[:2]) if period_param == "week" else d.isoformat()
+    rows = {period_key(today - timedelta(days=step * i)): {"Verse": 0, "Wörter": 0, "Sekunden": 0, "Fehler": 0}
+            for i in reversed(range(num_periods))}
+    for day, bucket in stats_param["daily"].get(username_param, {}).items():
+        row = rows.get(period_key(date.fromisoformat(day)))
+        if row is None: continue
+        row["Verse"] += bucket["verses"]; row["Wörter"] += bucket["words"]
+        row["Sekunden"] += bucket["seconds"]; row["Fehler"] += bucket["wrong"]
+    return [{"Zeitraum": key, **values} for key, values in rows.items()]
+
+# --- Backups ---
+# Jedes Backup ist ein vollständiges Abbild von user_data unter backups/<id>/ mit manifest.json
+# (SHA-256 je Datei). Unveränderte Dateien werden per Hardlink aus dem vorigen Backup übernommen.
+def _list_user_data_files():
+    rel_paths = []
+    for root, _, file_names in os.walk(USER_DATA_DIR):
+        for file_name in file_names:
+            if file_name.endswith(".tmp") or file_name == ".DS_Store": continue
+            rel_paths.append(os.path.relpath(os.path.join(root, file_name), USER_DATA_DIR).replace(os.sep, "/"))
+    return sorted(rel_paths)
+
+def _read_consistent_user_data():
+    # Liest alle Dateien unter Journal- und Daten-Lock -> konsistenter Zeitpunkt ohne die App anzuhalten
+    contents = {}; journal = _get_event_journal()
+    with journal["lock"], _get_data_lock():
+        for rel_path in _list_user_data_files():
+            with open(os.path.join(USER_DATA_DIR, rel_path), "rb") as f: contents[rel_path] = f.read()
+    for rel_path, content in contents.items(): # Journal: unvollständige letzte Zeile weglassen
+        if rel_path.endswith(".jsonl"): contents[rel_path] = content[:content.rfind(b"\n") + 1]
+    return contents
+
+def _is_valid_json_content(rel_path, content_bytes):
+    try:
+        if rel_path.endswith(".jsonl"):
+            for raw_line in content_bytes.splitlines(): json.loads(raw_line)
+        elif rel_path.endswith(".json"): json.loads(content_bytes)
+        return True
+    except ValueError: return False
+
+def list_backups():
+    if not os.path.isdir(BACKUP_DIR): return []
+    return sorted(b_id for b_id in os.listdir(BACKUP_DIR)
+                  if not b_id.endswith(".partial") and os.path.exists(os.path.join(BACKUP_DIR, b_id, BACKUP_MANIFEST_NAME)))
+
+def load_backup_manifest(backup_id_param): return load_data(os.path.join(BACKUP_DIR, backup_id_param, BACKUP_MANIFEST_NAME))
+
+def create_backup(compress_param=False):
+    contents = _read_consistent_user_data()
+    previous_ids = list_backups(); previous_id = previous_ids[-1] if previous_ids else None
+    previous_files = load_backup_manifest(previous_id).get("files", {}) if previous_id else {}
+    backup_id = datetime.now().strftime("%Y%m%d-%H%M%S-%f") # Sortierbar -> letztes Backup = Basis für Hardlinks
+    partial_dir = os.path.join(BACKUP_DIR, f"{backup_id}.partial") # Erst nach Abschluss umbenennen
+    manifest = {"id": backup_id, "created": time.time(), "parent": previous_id, "compressed": compress_param, "files": {}, "users": []}
+    try: manifest["users"] = sorted(json.loads(contents["users.json"])) # Für die Auswahl bei der Einzel-Wiederherstellung
+    except (KeyError, ValueError, TypeError): pass
+    try:
+        for rel_path, content in contents.items():
+            sha256 = hashlib.sha256(content).hexdigest(); stored_path = f"{rel_path}.gz" if compress_param else rel_path
+            target_path = os.path.join(partial_dir, stored_path); os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            previous_entry = previous_files.get(rel_path)
+            linked = False
+            if previous_entry and previous_entry["sha256"] == sha256 and previous_entry["stored"] == stored_path:
+                try: os.link(os.path.join(BACKUP_DIR, previous_id, stored_path), target_path); linked = True
+                except OSError: pass # z.B. Dateisystem ohne Hardlinks -> normal kopieren
+            if not linked:
+                with open(target_path, "wb") as f: f.write(gzip.compress(content) if compress_param else content)
+            manifest["files"][rel_path] = {"sha256": sha256, "size": len(content), "stored": stored_path,
+                                           "linked": linked, "valid_json": _is_valid_json_content(rel_path, content)}
+        with open(os.path.join(partial_dir, BACKUP_MANIFEST_NAME), "w", encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(partial_dir, os.path.join(BACKUP_DIR, backup_id))
+    except OSError: shutil.rmtree(partial_dir, ignore_errors=True); raise
+    return manifest
+
+BACKUP_READ_ERRORS = (OSError, EOFError, zlib.error) # Fehlende, abgeschnittene oder kaputte (gzip-)Dateien
+
+def _read_backup_file(backup_id_param, file_entry):
+    with open(os.path.join(BACKUP_DIR, backup_id_param, file_entry["stored"]), "rb") as f: content = f.read()
+    return gzip.decompress(content) if file_entry["stored"].endswith(".gz") else content
+
+def verify_backup(backup_id_param):
+    # Liefert die Dateien, deren Hash nicht stimmt oder deren JSON ungültig ist
+    problems = []
+    for rel_path, file_entry in load_backup_manifest(backup_id_param).get("files", {}).items():
+        try: content = _read_backup_file(backup_id_param, file_entry)
+        except BACKUP_READ_ERRORS: problems.append(rel_path); continue
+        if hashlib.sha256(content).hexdigest() != file_entry["sha256"] or not _is_valid_json_content(rel_path, content):
+            problems.append(rel_path)
+    return problems
+
+def restore_backup(backup_id_param, rel_paths_param=None):
+    # Ohne rel_paths_param wird alles wiederhergestellt (inkl. Lern-Journal); Dateien, die nicht im Backup sind, werden gelöscht
+    backup_files = load_backup_manifest(backup_id_param).get("files", {})
+    selected = backup_files if rel_paths_param is None else {p: backup_files[p] for p in rel_paths_param if p in backup_files}
+    try: contents = {rel_path: _read_backup_file(backup_id_param, file_entry) for rel_path, file_entry in selected.items()}
+    except BACKUP_READ_ERRORS as e: raise ValueError(f"Backup-Datei nicht lesbar: {e}")
+    for rel_path, content in contents.items():
+        if hashlib.sha256(content).hexdigest() != selected[rel_path]["sha256"]: raise ValueError(f"Prüfsumme falsch: {rel_path}")
+    journal = _get_event_journal()
+    with journal["lock"], _get_data_lock():
+        if rel_paths_param is None: # z.B. neuerer stats_snapshot.json oder Vers-Dateien später angelegter Benutzer
+            for rel_path in _list_user_data_files():
+                if rel_path not in contents: os.remove(os.path.join(USER_DATA_DIR, rel_path))
+        for rel_path, content in contents.items():
+            target_path = os.path.join(USER_DATA_DIR, rel_path); os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            _write_file_atomic(target_path, content)
+        if rel_paths_param is None or any(rel_path.startswith("events/") for rel_path in contents): # Offenes Segment zeigt sonst auf eine ersetzte/gelöschte Datei
+            if journal["fh"] is not None: journal["fh"].close(); journal["fh"] = None
+            segments = _list_event_segments(); journal["segment"] = segments[-1] if segments else 1
+            journal["pending"] = 0; journal["since_snapshot"] = 0
+    return sorted(contents)
+
+def _learning_stats_from_backup(backup_id_param, backup_files_param):
+    def read_json(rel_path): return json.loads(_read_backup_file(backup_id_param, backup_files_param[rel_path]))
+    if "stats_snapshot.json" in backup_files_param: stats = read_json("stats_snapshot.json")
+    else: stats = _empty_learning_stats(read_json("users.json") if "users.json" in backup_files_param else {})
+    segments = {}
+    for rel_path, file_entry in backup_files_param.items():
+        match = re.match(r"^events/events_(\d+)\.jsonl$", rel_path)
+        if match: segments[int(match.group(1))] = _read_backup_file(backup_id_param, file_entry)
+    return _fold_event_tail(stats, segments)
+
+def restore_user_from_backup(backup_id_param, username_param, include_account_param=True):
+    # Stellt Verse/Fortschritt, Punkte und Lernstatistik eines Benutzers (optional auch seinen users.json-Eintrag) wieder her
+    backup_files = load_backup_manifest(backup_id_param).get("files", {})
+    try:
+        backup_users = json.loads(_read_backup_file(backup_id_param, backup_files["users.json"])) if "users.json" in backup_files else {}
+        backup_stats = _learning_stats_from_backup(backup_id_param, backup_files)
+    except BACKUP_READ_ERRORS as e: raise ValueError(f"Backup-Datei nicht lesbar: {e}")
+    verse_rel_path = os.path.relpath(get_user_verse_file(username_param), USER_DATA_DIR).replace(os.sep, "/")
+    restored = restore_backup(backup_id_param, [verse_rel_path])
+    if include_account_param and username_param in backup_users:
+        with _get_data_lock(): # Read-Modify-Write darf sich nicht mit anderen Schreibzugriffen überschneiden
+            current_users = load_users(); current_teams = load_teams()
+            old_team_id = current_users.get(username_param, {}).get("team_id")
+            current_users[username_param] = backup_users[username_param]; new_team_id = current_users[username_param].get("team_id")
+            if old_team_id != new_team_id:
+                if old_team_id in current_teams and username_param in current_teams[old_team_id].get("members", []):
+                    current_teams[old_team_id]["members"].remove(username_param)
+                if new_team_id in current_teams and username_param not in current_teams[new_team_id].get("members", []):
+                    current_teams[new_team_id].setdefault("members", []).append(username_param)
+                elif new_team_id not in current_teams: current_users[username_param]["team_id"] = None
+                _write_file_atomic(TEAM_DATA_FILE, _json_bytes(current_teams))
+            _write_file_atomic(USERS_FILE, _json_bytes(current_users))
+        restored.append("users.json")
+    _append_event({"ts": time.time(), "type": "restore_user", "user": username_param,
+                   "totals": backup_stats["totals"].get(username_param, dict.fromkeys(STATS_COUNTER_KEYS, 0)),
+                   "daily": backup_stats["daily"].get(username_param, {})})
+    return restored
+
 # --- UI Hilfsfunktionen ---
 def is_format_likely_correct(text_param):
     if not text_param or not isinstance(text_param, str): return False
@@ -165,12 +481,18 @@ def group_words_into_chunks(words_param, max_chunks_param=MAX_CHUNKS):
         chunks_list.append(" ".join(words_param[current_idx_gwic : current_idx_gwic + chunk_size])); current_idx_gwic += chunk_size
     return chunks_list
 
-def display_leaderboard_in_sidebar(users_map_param, teams_map_param):
+def display_leaderboard_in_sidebar(users_map_param, teams_map_param, learning_stats_param):
+    window_lb = st.radio("Zeitraum", list(LEADERBOARD_WINDOWS.keys()), format_func=lambda k: LEADERBOARD_WINDOWS[k],
+                         horizontal=True, key="leaderboard_window")
+    if window_lb == "all": points_by_user = {username_lb: learning_stats_param["totals"].get(username_lb, {}).get('points', 0) for username_lb in users_map_param}
+    else: # Zeitfenster: Punkte = im Zeitraum korrekt gelernte Wörter (aus dem Lern-Journal)
+        windowed_words = words_learned_since(learning_stats_param, window_lb)
+        points_by_user = {username_lb: windowed_words.get(username_lb, 0) for username_lb in users_map_param}
+
     # Einzelspieler Leaderboard
     st.subheader(f"🏆 Einzelspieler Top {LEADERBOARD_SIZE}")
     if users_map_param:
-        user_points_list = [{"Spieler": username_lb, "Punkte": data_lb.get('points', 0)} 
-                            for username_lb, data_lb in users_map_param.items()]
+        user_points_list = [{"Spieler": username_lb, "Punkte": points_lb} for username_lb, points_lb in points_by_user.items()]
         sorted_users_df = pd.DataFrame(user_points_list).sort_values(by="Punkte", ascending=False).head(LEADERBOARD_SIZE)
         if not sorted_users_df.empty:
             chart_users = alt.Chart(sorted_users_df).mark_bar().encode(
@@ -187,8 +509,7 @@ def display_leaderboard_in_sidebar(users_map_param, teams_map_param):
     if teams_map_param:
         teams_with_calc_points = []
         for team_id_calc, team_data_calc in teams_map_param.items():
-            member_points_total = sum(users_map_param.get(member_username, {}).get("points", 0) 
-                                      for member_username in team_data_calc.get("members", []))
+            member_points_total = sum(points_by_user.get(member_username, 0) for member_username in team_data_calc.get("members", []))
             teams_with_calc_points.append({"Team": team_data_calc.get('name', 'N/A'), "Punkte": member_points_total})
         
         sorted_teams_df = pd.DataFrame(teams_with_calc_points).sort_values(by="Punkte", ascending=False).head(LEADERBOARD_SIZE)
@@ -216,14 +537,14 @@ if "logged_in_user" not in st.session_state: st.session_state.logged_in_user = N
 if "admin_logged_in" not in st.session_state: st.session_state.admin_logged_in = False
 # ... (weitere Session State Initialisierungen) ...
 
-users = load_users(); teams = load_teams()
+users = load_users(); teams = load_teams(); learning_stats = load_learning_stats()
 
 # --- Hauptanwendung ---
 if st.session_state.logged_in_user:
     username = st.session_state.logged_in_user
     st.sidebar.title(f"Hallo {username}!")
     user_data_global = users.get(username, {})
-    st.sidebar.markdown(f"**🏆 Punkte: {user_data_global.get('points', 0)}**")
+    st.sidebar.markdown(f"**🏆 Punkte: {learning_stats['totals'].get(username, {}).get('points', 0)}**")
 
     if st.sidebar.button("🔒 Logout"):
         # ... (Logout Logik - Persistenz des aktuellen Textes) ...
@@ -251,15 +572,17 @@ if st.session_state.logged_in_user:
                 old_team_id = users[username]['team_id']; users[username]['team_id'] = None
                 if old_team_id and old_team_id in teams and username in teams[old_team_id].get('members', []):
                     teams[old_team_id]['members'].remove(username)
-                save_users(users); save_teams(teams); st.success("Team verlassen."); st.rerun()
+                with _get_data_lock(): save_users(users); save_teams(teams)
+                st.success("Team verlassen."); st.rerun()
         else:
             st.markdown(f"Team: {current_team_name}")
             st.write("Erstellen:"); new_team_name = st.text_input("Teamname", key="new_team_name_sb_v7")
             if st.button("Ok", key="create_team_btn_sb_v7"):
                 if new_team_name:
                     team_id = str(uuid.uuid4()); team_code = generate_team_code()
-                    teams[team_id] = {"name": new_team_name, "code": team_code, "members": [username], "points": 0}
-                    users[username]['team_id'] = team_id; save_teams(teams); save_users(users)
+                    teams[team_id] = {"name": new_team_name, "code": team_code, "members": [username]}
+                    users[username]['team_id'] = team_id
+                    with _get_data_lock(): save_teams(teams); save_users(users)
                     st.success(f"'{new_team_name}' erstellt! Code: {team_code}"); st.rerun()
                 else: st.error("Name fehlt.")
             st.write("Beitreten:"); join_code = st.text_input("Team-Code", key="join_code_sb_v7").upper()
@@ -268,16 +591,28 @@ if st.session_state.logged_in_user:
                 if found_id:
                     users[username]['team_id'] = found_id
                     if username not in teams[found_id].get('members', []): teams[found_id]['members'].append(username)
-                    save_users(users); save_teams(teams); st.success(f"'{teams[found_id]['name']}' beigetreten!"); st.rerun()
+                    with _get_data_lock(): save_users(users); save_teams(teams)
+                    st.success(f"'{teams[found_id]['name']}' beigetreten!"); st.rerun()
                 else: st.error("Code ungültig.")
     
     with st.sidebar.expander("🏆 Leaderboard", expanded=False):
-        display_leaderboard_in_sidebar(users, teams)
+        display_leaderboard_in_sidebar(users, teams, learning_stats)
     
     with st.sidebar.expander("📊 Statistiken", expanded=False):
-        st.subheader("Deine Statistiken"); st.markdown(f"⏳ Zeit: {user_data_global.get('learning_time_seconds', 0)} Sek.")
-        st.markdown(f"📖 Verse: {user_data_global.get('total_verses_learned', 0)}")
-        st.markdown(f"✍️ Wörter: {user_data_global.get('total_words_learned', 0)}")
+        user_totals = learning_stats["totals"].get(username, {})
+        st.subheader("Deine Statistiken"); st.markdown(f"⏳ Zeit: {user_totals.get('learning_time_seconds', 0)} Sek.")
+        st.markdown(f"📖 Verse: {user_totals.get('total_verses_learned', 0)}")
+        st.markdown(f"✍️ Wörter: {user_totals.get('total_words_learned', 0)}")
+        stats_period = st.radio("Verlauf", ["day", "week"], format_func=lambda k: {"day": "Tage", "week": "Wochen"}[k], horizontal=True, key="stats_period")
+        history_df = pd.DataFrame(aggregate_learning_stats(learning_stats, username, stats_period))
+        current_period = history_df.iloc[-1]
+        st.markdown(f"{'Heute' if stats_period == 'day' else 'Diese Woche'}: 📖 {current_period['Verse']} · ✍️ {current_period['Wörter']} · ❌ {current_period['Fehler']}")
+        chart_history = alt.Chart(history_df).mark_bar().encode(
+            x=alt.X('Zeitraum:N', sort=None, axis=alt.Axis(title=None)),
+            y=alt.Y('Verse:Q', axis=alt.Axis(title='Verse')),
+            tooltip=['Zeitraum', 'Verse', 'Wörter', 'Sekunden', 'Fehler']
+        ).properties(height=150)
+        st.altair_chart(chart_history, use_container_width=True)
 
     with st.sidebar.expander(f"📥 Eigenen Text hinzufügen", expanded=False): # Nur private Texte
         title = st.text_input("Titel (Privat)", key=f"title_sb_v8_{st.session_state.selected_language}").strip()
@@ -339,12 +674,39 @@ if st.session_state.logged_in_user:
                         st.success("Alle öffentlichen Texte wurden gelöscht!"); st.rerun()
                 if st.button("⚠️ Alle Benutzerpunkte zurücksetzen", key="admin_reset_all_points"):
                     if st.checkbox("Ja, ich bin sicher, ALLE Benutzerpunkte auf 0 zu setzen.", key="admin_confirm_reset_points"):
-                        current_users = load_users()
-                        for u_name in current_users: current_users[u_name]['points'] = 0
-                        save_users(current_users)
+                        append_points_reset_event(); materialize_stats_snapshot()
                         # Team-Punkte werden dynamisch berechnet, keine separate Aktion nötig
                         st.success("Alle Benutzerpunkte wurden zurückgesetzt!"); st.rerun()
 
+            st.markdown("---"); st.subheader("Backups")
+            backup_compress = st.checkbox("Komprimieren (gzip)", key="admin_backup_compress")
+            if st.button("💾 Backup erstellen", key="admin_backup_create"):
+                try:
+                    new_manifest = create_backup(backup_compress)
+                    n_linked = sum(1 for f_entry in new_manifest["files"].values() if f_entry["linked"])
+                    invalid_files = [p for p, f_entry in new_manifest["files"].items() if not f_entry["valid_json"]]
+                    st.success(f"Backup {new_manifest['id']} erstellt ({len(new_manifest['files'])} Dateien, {n_linked} unverändert verlinkt).")
+                    if invalid_files: st.warning(f"Ungültiges JSON gesichert: {', '.join(invalid_files)}")
+                except OSError as e: st.error(f"Backup fehlgeschlagen: {e}")
+            available_backups = list_backups()
+            if available_backups:
+                backup_id_sel = st.selectbox("Backup", available_backups[::-1], key="admin_backup_select")
+                if st.button("🔍 Backup prüfen", key="admin_backup_verify"):
+                    backup_problems = verify_backup(backup_id_sel)
+                    if backup_problems: st.error(f"Fehlerhaft: {', '.join(backup_problems)}")
+                    else: st.success("Backup ist vollständig und gültig.")
+                backup_users = load_backup_manifest(backup_id_sel).get("users", [])
+                restore_scope = st.selectbox("Wiederherstellen", ["__all__"] + backup_users,
+                                             format_func=lambda k: "Alle Daten" if k == "__all__" else f"Nur Benutzer: {k}", key="admin_restore_scope")
+                restore_confirm = st.checkbox("Ja, ich bin sicher, die aktuellen Daten zu überschreiben.", key="admin_restore_confirm")
+                if st.button("⚠️ Wiederherstellen", key="admin_restore_btn", disabled=not restore_confirm):
+                    try:
+                        if restore_scope == "__all__": restored_files = restore_backup(backup_id_sel)
+                        else: restored_files = restore_user_from_backup(backup_id_sel, restore_scope)
+                        st.success(f"{len(restored_files)} Datei(en) wiederhergestellt."); st.rerun()
+                    except (*BACKUP_READ_ERRORS, ValueError) as e: st.error(f"Wiederherstellung fehlgeschlagen: {e}")
+            else: st.write("Noch keine Backups.")
+
             st.markdown("---"); st.subheader("Datenexport")
             if st.button("Punktestände als PDF exportieren (Konzept)", key="admin_pdf_export_btn_v2"):
                 st.info("PDF Export-Funktion. Benötigt FPDF & Matplotlib/Plotly.")
@@ -529,6 +891,7 @@ if st.session_state.logged_in_user:
                 st.session_state[f"used_chunks_{key_base_learn}"]=[False]*n_chunks; st.session_state[f"feedback_{key_base_learn}"]=False
                 st.session_state["current_ref"]=verse.get("ref"); st.session_state["cv_data"]={"ref":verse.get("ref"),"text":verse.get("text"),"o_chunks":chunks,"tokens":tokens}
                 st.session_state[f"pts_awarded_{key_base_learn}"]=False; st.session_state[f"start_time_{key_base_learn}"]=time.time()
+                st.session_state[f"wrong_logged_{key_base_learn}"]=False
 
             s_chunks=st.session_state[f"s_chunks_{key_base_learn}"]; sel_chunks=st.session_state[f"sel_chunks_{key_base_learn}"]; used=st.session_state[f"used_chunks_{key_base_learn}"]
             st.markdown(f"### {VERSE_EMOJI} {verse.get('ref')}")
@@ -555,7 +918,8 @@ if st.session_state.logged_in_user:
                       if sel_chunks:
                           _,orig_idx=sel_chunks.pop();used[orig_idx]=False
                           st.session_state[f"sel_chunks_{key_base_learn}"]=sel_chunks;st.session_state[f"used_chunks_{key_base_learn}"]=used
-                          if st.session_state.get(f"feedback_{key_base_learn}",False) and len(sel_chunks)<n_chunks:st.session_state[f"feedback_{key_base_learn}"]=False
+                          if st.session_state.get(f"feedback_{key_base_learn}",False) and len(sel_chunks)<n_chunks:
+                              st.session_state[f"feedback_{key_base_learn}"]=False;st.session_state[f"wrong_logged_{key_base_learn}"]=False
                           st.rerun()
             st.markdown("---")
 
@@ -570,13 +934,9 @@ if st.session_state.logged_in_user:
                     is_last_verse = (idx == total_verses - 1)
                     
                     if not pts_awarded:
-                        users[username]["points"]=users[username].get("points",0)+tokens_count
                         start=st.session_state.get(f"start_time_{key_base_learn}",time.time());duration=time.time()-start
-                        users[username]['learning_time_seconds']+=int(duration);users[username]['total_verses_learned']+=1
-                        users[username]['total_words_learned']+=tokens_count
-                        team_id=users[username].get('team_id')
-                        if team_id and team_id in teams:teams[team_id]['points']=teams[team_id].get('points',0)+tokens_count;save_teams(teams)
-                        save_users(users);st.session_state[f"pts_awarded_{key_base_learn}"]=True
+                        append_learning_event(username,current_language,actual_title,cv_data.get("ref"),True,duration,tokens_count) # Punkte & Statistik
+                        st.session_state[f"pts_awarded_{key_base_learn}"]=True
                     
                     st.success("✅ Richtig!")
                     st.markdown(f"<div style='background-color:#e6ffed;color:#094d21;padding:10px;border-radius:5px;'><b>{correct_txt}</b></div>",unsafe_allow_html=True)
@@ -627,6 +987,10 @@ if st.session_state.logged_in_user:
                     st.markdown("<b>Deine Eingabe:</b>",unsafe_allow_html=True);st.markdown(f"<div style='background-color:#ffebeb;color:#8b0000;padding:10px;border-radius:5px;'>{highlighted}</div>",unsafe_allow_html=True)
                     st.markdown("<b>Korrekt wäre:</b>",unsafe_allow_html=True);st.markdown(f"<div style='background-color:#e6ffed;color:#094d21;padding:10px;border-radius:5px;'>{correct_txt}</div>",unsafe_allow_html=True)
                     st.session_state[f"pts_awarded_{key_base_learn}"]=False
+                    if not st.session_state.get(f"wrong_logged_{key_base_learn}",False): # Fehlversuch nur einmal pro Versuch journalisieren
+                        start=st.session_state.get(f"start_time_{key_base_learn}",time.time())
+                        append_learning_event(username,current_language,actual_title,cv_data.get("ref"),False,time.time()-start,tokens_count)
+                        st.session_state[f"wrong_logged_{key_base_learn}"]=True
                     cols_fb=st.columns([1,1.5,1])
                     with cols_fb[0]: 
                         show_prev=(current_mode=='linear' and total_verses>1 and idx>0)
@@ -681,12 +1045,12 @@ else: # Nicht eingeloggt
             elif len(reg_pw)<6:st.session_state.register_error="Passwort zu kurz."
             else:
                  pw_hash=hash_password(reg_pw)
-                 users[reg_user]={"password_hash":pw_hash,"points":0,"team_id":None,"learning_time_seconds":0,"total_verses_learned":0,"total_words_learned":0}
+                 users[reg_user]={"password_hash":pw_hash,"team_id":None} # Punkte/Statistik kommen aus dem Lern-Journal
                  save_users(users);st.session_state.logged_in_user=reg_user;st.session_state.register_error=None
                  if "login_error" in st.session_state:del st.session_state.login_error
                  st.session_state.selected_language=DEFAULT_LANGUAGE;st.session_state.admin_logged_in=False;
                  st.success("Registriert & angemeldet!");st.rerun()
             if st.session_state.register_error:st.error(st.session_state.register_error)
     st.title("📖 Vers-Lern-App");st.markdown("Bitte melde dich an oder registriere dich.")
-    with st.sidebar.expander("🏆 Leaderboard",expanded=False):display_leaderboard_in_sidebar(users,teams)
+    with st.sidebar.expander("🏆 Leaderboard",expanded=False):display_leaderboard_in_sidebar(users,teams,learning_stats)
     with st.sidebar.expander("📊 Statistiken",expanded=False):st.write("Melde dich an für Statistiken.")
\ No newline at end of file